@@ -17,6 +17,8 @@ Options:
     --wait-time MS   Time to wait for JS rendering in milliseconds (default: 5000)
     --render-js      Always use headless browser for URLs (requires playwright)
     --no-render-js   Never use headless browser, even for JS-rendered pages
+    --cache          Reuse earlier conversions of identical HTML from <output-dir>/.cache
+    -j, --jobs N     Convert in N worker processes instead of threads
 
 Examples:
     python clean.py https://example.com/page
@@ -29,20 +31,31 @@ Examples:
 Dependencies:
     beautifulsoup4 (pip install beautifulsoup4)
 
-Optional Dependencies (for JavaScript-rendered pages):
-    playwright (pip install playwright && playwright install chromium)
+Optional Dependencies:
+    lxml (pip install lxml) - faster parsing, falls back to html.parser without it
+    playwright (pip install playwright && playwright install chromium) - for JavaScript-rendered pages
 """
 
 import argparse
+import codecs
+import gzip
+import hashlib
+import html
+import http.client
 import os
+import queue
 import re
 import sys
+import threading
 import urllib.request
 import urllib.error
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache, partial
 from pathlib import Path
-from urllib.parse import urlparse
+from typing import Optional
+from urllib.parse import urljoin, urlparse, urlsplit
 try:
-    from bs4 import BeautifulSoup, Comment
+    from bs4 import BeautifulSoup, CData, Comment, FeatureNotFound, NavigableString, Tag
 except ImportError:
     print("Error: BeautifulSoup is not installed. Install with 'pip install beautifulsoup4'")
     sys.exit(1)
@@ -65,55 +78,137 @@ SPA_INDICATORS = [
     'data-reactroot',    # React
 ]
 
+def has_spa_indicator(html_content: str) -> bool:
+    """Check the raw HTML for SPA framework indicators."""
+    # Separate substring scans beat a fused regex here: str.__contains__ skips
+    # through the text with a fast C search, while re tests every position
+    return any(indicator in html_content for indicator in SPA_INDICATORS)
+
+# Content containers looked up by class and by ID
+CONTENT_CLASS_RE = re.compile('main-content', re.IGNORECASE)
+CONTENT_ID_RE = re.compile('content', re.IGNORECASE)
+# IDs of the empty placeholder divs that are common in SPAs,
+# e.g. <div id="app"></div>, <div id="root"></div>, <div id="__next"></div>
+SPA_ROOT_IDS = ['app', 'root', '__next', 'scalar-api-reference', 'application']
+
+# Elements whose text doesn't count as visible content
+INVISIBLE_TEXT_TAGS = {'script', 'style'}
+# String types that count as text (get_text() skips comments, template and ruby strings)
+TEXT_STRING_TYPES = (NavigableString, CData)
+
+def visible_text_length(tag: Tag, limit: int) -> int:
+    """Count the stripped text of tag outside scripts and styles, stopping at limit.
+    
+    Equivalent to len(tag.get_text(strip=True)) once scripts and styles are
+    removed, but leaves the tree untouched so it can still be converted.
+    """
+    length = 0
+    stack = [tag]
+    while stack:
+        for child in stack.pop().contents:
+            if isinstance(child, Tag):
+                if child.name not in INVISIBLE_TEXT_TAGS:
+                    stack.append(child)
+            elif type(child) in TEXT_STRING_TYPES:
+                length += len(child.strip())
+                if length >= limit:
+                    return length
+    return length
+
 def detect_js_rendered_content(soup: BeautifulSoup, html_content: str) -> bool:
     """
     Detect if the page content is rendered by JavaScript (SPA).
+    
+    Only reads the soup, so the same tree can be converted afterwards.
     """
     # Check for SPA framework indicators in raw HTML
-    has_spa_indicator = any(indicator in html_content for indicator in SPA_INDICATORS)
-    
-    if not has_spa_indicator:
+    if not has_spa_indicator(html_content):
         return False
     
-    # Check if main content containers are empty or near-empty
-    # Look for common content containers
-    content_containers = (
-        soup.find('main') or 
-        soup.find('article') or 
-        soup.find(class_=lambda c: c and 'main-content' in ' '.join(c).lower() if isinstance(c, list) else 'main-content' in c.lower() if c else False) or
-        soup.find(id=lambda i: i and 'content' in i.lower() if i else False)
-    )
+    # Check if main content containers are empty or near-empty. One walk finds
+    # the candidates that separate find() calls would return: the first <main>,
+    # <article>, 'main-content' class, 'content' ID and each SPA root ID
+    main = article = by_class = by_id = None
+    spa_roots = {}
+    for tag in soup.find_all(True):
+        name = tag.name
+        if name == 'main':
+            if main is None:
+                main = tag
+        elif name == 'article':
+            if article is None:
+                article = tag
+        attrs = tag.attrs
+        if not attrs:
+            continue
+        classes = attrs.get('class')
+        if by_class is None and classes and CONTENT_CLASS_RE.search(' '.join(classes)):
+            by_class = tag
+        elem_id = attrs.get('id')
+        if elem_id:
+            if by_id is None and CONTENT_ID_RE.search(elem_id):
+                by_id = tag
+            if elem_id in SPA_ROOT_IDS and elem_id not in spa_roots:
+                spa_roots[elem_id] = tag
+    content_containers = main or article or by_class or by_id
     
-    if content_containers:
-        # Get text content, ignoring scripts and styles
-        for tag in content_containers.find_all(['script', 'style']):
-            tag.decompose()
-        text_content = content_containers.get_text(strip=True)
-        # If main content area has very little text, it's likely JS-rendered
-        if len(text_content) < 100:
-            return True
+    # If main content area has very little text (ignoring scripts and styles),
+    # it's likely JS-rendered
+    if content_containers and visible_text_length(content_containers, 100) < 100:
+        return True
     
     # Check for empty placeholder divs that are common in SPAs
-    # e.g., <div id="app"></div>, <div id="root"></div>, <div id="__next"></div>
-    spa_root_ids = ['app', 'root', '__next', 'scalar-api-reference', 'application']
-    for root_id in spa_root_ids:
-        element = soup.find(id=root_id)
-        if element and not element.get_text(strip=True):
+    for root_id in SPA_ROOT_IDS:
+        element = spa_roots.get(root_id)
+        if element and not visible_text_length(element, 1):
             return True
     
     return False
 
+def parse_html(html_content: str, skip_non_content: bool = False) -> tuple:
+    """Parse HTML into a soup, using lxml when it is installed.
+    
+    The whole document is parsed, since content after a stray </body> or
+    </html> is still part of the page. The <title> is taken out of the tree so
+    it doesn't leak into the text.
+    
+    Args:
+        html_content: The HTML to parse
+        skip_non_content: Leave NON_CONTENT_TAGS elements out of the tree entirely
+            (JS detection needs them, conversion doesn't)
+    
+    Returns:
+        tuple: (soup, title) where title is the text of the extracted <title>
+    """
+    try:
+        soup_class = ContentSoup if skip_non_content and content_soup_works('lxml') else BeautifulSoup
+        soup = soup_class(html_content, 'lxml')
+    except FeatureNotFound:
+        soup_class = ContentSoup if skip_non_content and content_soup_works('html.parser') else BeautifulSoup
+        soup = soup_class(html_content, 'html.parser')
+    return soup, extract_title(soup)
+
 def is_url(path: str) -> bool:
     """Check if the given path is a URL."""
+    if ':' not in path:
+        return False  # No scheme, so a plain local path
     try:
         result = urlparse(path)
         return result.scheme in ('http', 'https')
     except ValueError:
         return False
 
-def get_output_path(input_path: str, output_dir: str = "output") -> str:
-    """Generate output path in the output folder based on input filename."""
-    if is_url(input_path):
+def get_output_path(input_path: str, output_dir: str = "output", input_is_url: Optional[bool] = None) -> str:
+    """Generate output path in the output folder based on input filename.
+    
+    Args:
+        input_path: Path to HTML file or URL
+        output_dir: Directory the markdown file goes in
+        input_is_url: is_url(input_path), if the caller already knows it
+    """
+    if input_is_url is None:
+        input_is_url = is_url(input_path)
+    if input_is_url:
         # Extract filename from URL path
         parsed = urlparse(input_path)
         url_path = parsed.path.rstrip('/')
@@ -135,39 +230,217 @@ def get_output_path(input_path: str, output_dir: str = "output") -> str:
     
     return os.path.join(output_dir, output_filename)
 
+FETCH_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows 11; Win64; x64)',
+    'Accept-Encoding': 'gzip',
+}
+FETCH_TIMEOUT = 30
+# Same limit urllib applies when it follows redirects itself
+MAX_REDIRECTS = 10
+REDIRECT_STATUSES = {301, 302, 303, 307, 308}
+
+class ConnectionPool:
+    """Idle keep-alive HTTP(S) connections, reused across fetches to the same host.
+    
+    Shared by the worker threads, so a batch of URLs on one site pays for the
+    TCP and TLS handshakes once per connection rather than once per page.
+    """
+    
+    def __init__(self, timeout: int = FETCH_TIMEOUT):
+        self.timeout = timeout
+        self._idle = {}
+        self._lock = threading.Lock()
+    
+    def acquire(self, scheme: str, netloc: str) -> tuple[http.client.HTTPConnection, bool]:
+        """Return an idle connection to the host (or a new one) and whether it was reused."""
+        with self._lock:
+            idle = self._idle.get((scheme, netloc))
+            if idle:
+                return idle.pop(), True
+        if scheme == 'https':
+            return http.client.HTTPSConnection(netloc, timeout=self.timeout), False
+        return http.client.HTTPConnection(netloc, timeout=self.timeout), False
+    
+    def release(self, scheme: str, netloc: str, connection: http.client.HTTPConnection,
+                response: http.client.HTTPResponse) -> None:
+        """Put a connection back once its response has been fully read."""
+        if response.will_close or not response.isclosed():
+            connection.close()
+            return
+        with self._lock:
+            self._idle.setdefault((scheme, netloc), []).append(connection)
+
+HTTP_POOL = ConnectionPool()
+
+# Bytes read from a response body at a time
+READ_CHUNK_SIZE = 64 * 1024
+
+def read_response_text(response: http.client.HTTPResponse) -> str:
+    """Read and decode a response body, decompressing gzip content."""
+    stream = response
+    if response.headers.get('Content-Encoding', '').lower() == 'gzip':
+        stream = gzip.GzipFile(fileobj=response)
+    # Try to detect encoding from response headers, falling back to UTF-8
+    charset = response.headers.get_content_charset() or 'utf-8'
+    # Decode chunk by chunk as it arrives, so the whole body is never held as
+    # bytes next to its decoded text (TextIOWrapper.read() reads it all first)
+    decoder = codecs.getincrementaldecoder(charset)()
+    parts = [decoder.decode(chunk) for chunk in iter(partial(stream.read, READ_CHUNK_SIZE), b'')]
+    parts.append(decoder.decode(b'', final=True))
+    return ''.join(parts)
+
+def request_pooled(url: str) -> tuple[str, http.client.HTTPConnection, http.client.HTTPResponse]:
+    """Send a GET over a pooled connection, following redirects.
+    
+    Returns:
+        tuple: (final_url, connection, response) with the response body still unread
+    
+    Raises:
+        urllib.error.HTTPError: If the server answers with an error status
+        OSError, http.client.HTTPException: If the request fails
+    """
+    for _ in range(MAX_REDIRECTS + 1):
+        # urlsplit() keeps ';params' in the path, where urlparse() would split them off
+        parsed = urlsplit(url)
+        if parsed.scheme not in ('http', 'https'):
+            raise http.client.HTTPException(f"redirected to unsupported URL '{url}'")
+        path = parsed.path or '/'
+        if parsed.query:
+            path += '?' + parsed.query
+        
+        while True:
+            connection, reused = HTTP_POOL.acquire(parsed.scheme, parsed.netloc)
+            try:
+                connection.request('GET', path, headers=FETCH_HEADERS)
+                response = connection.getresponse()
+                break
+            except ConnectionError:
+                connection.close()
+                # The server may have dropped an idle keep-alive connection; retry on a new one
+                if not reused:
+                    raise
+        
+        location = response.getheader('Location')
+        if response.status in REDIRECT_STATUSES and location:
+            # Drain the redirect body so the connection can be reused
+            response.read()
+            HTTP_POOL.release(parsed.scheme, parsed.netloc, connection, response)
+            url = urljoin(url, location)
+            continue
+        
+        if response.status >= 400:
+            connection.close()
+            raise urllib.error.HTTPError(url, response.status, response.reason, response.headers, None)
+        
+        return url, connection, response
+    
+    raise http.client.HTTPException(f"more than {MAX_REDIRECTS} redirects")
+
+class FetchError(Exception):
+    """Raised when a URL can't be fetched; the message describes why."""
+
 def fetch_url(url: str) -> str:
-    """Fetch HTML content from a URL."""
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows 11; Win64; x64)'
-    }
-    request = urllib.request.Request(url, headers=headers)
+    """Fetch HTML content from a URL, reusing pooled keep-alive connections.
     
+    Raises:
+        FetchError: If the page can't be fetched or decoded
+    """
     try:
-        with urllib.request.urlopen(request, timeout=30) as response:
-            # Try to detect encoding from response headers
-            charset = response.headers.get_content_charset()
-            if charset:
-                return response.read().decode(charset)
-            else:
-                # Fall back to UTF-8
-                return response.read().decode('utf-8')
+        if urllib.request.getproxies():
+            # http.client doesn't route through proxies, so leave those requests to urllib
+            request = urllib.request.Request(url, headers=FETCH_HEADERS)
+            with urllib.request.urlopen(request, timeout=FETCH_TIMEOUT) as response:
+                return read_response_text(response)
+        
+        final_url, connection, response = request_pooled(url)
+        try:
+            html_content = read_response_text(response)
+        except BaseException:
+            # A half-read response leaves the connection unusable, so it can't go back to the pool
+            connection.close()
+            raise
+        parsed = urlparse(final_url)
+        HTTP_POOL.release(parsed.scheme, parsed.netloc, connection, response)
+        return html_content
     except urllib.error.HTTPError as e:
-        print(f"Error: HTTP {e.code} - {e.reason} when fetching '{url}'")
-        sys.exit(1)
+        raise FetchError(f"HTTP {e.code} - {e.reason} when fetching '{url}'") from e
     except urllib.error.URLError as e:
-        print(f"Error: Could not connect to '{url}': {e.reason}")
-        sys.exit(1)
-    except UnicodeDecodeError:
-        print(f"Error: Unable to decode content from '{url}' as UTF-8.")
-        sys.exit(1)
+        raise FetchError(f"Could not connect to '{url}': {e.reason}") from e
+    except UnicodeDecodeError as e:
+        raise FetchError(f"Unable to decode content from '{url}' as UTF-8.") from e
+    except (gzip.BadGzipFile, EOFError) as e:
+        raise FetchError(f"Received corrupt gzip content from '{url}'.") from e
+    except (OSError, http.client.HTTPException) as e:
+        raise FetchError(f"Could not connect to '{url}': {e}") from e
+
+class BrowserSession:
+    """A headless Chromium shared by the pages rendered in one thread.
+    
+    The browser is launched on the first fetch() and closed when the session
+    exits, so a batch of JS-rendered pages pays the launch cost once. Playwright's
+    sync API is bound to the thread that started it, so each worker thread needs
+    its own session.
+    """
+    
+    def __init__(self):
+        self._playwright = None
+        self._browser = None
+    
+    def __enter__(self) -> 'BrowserSession':
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+    
+    def fetch(self, url: str, timeout: int = 30000, wait_time: int = 5000) -> str:
+        """Render a URL in a new page of the shared browser and return its HTML.
+        
+        Args:
+            url: The URL to fetch
+            timeout: Navigation timeout in milliseconds (default 30 seconds)
+            wait_time: Additional time to wait after networkidle for JS rendering (default 5 seconds)
+        
+        Raises:
+            Exception: If browser fails to launch or page fails to load
+        """
+        if self._browser is None:
+            self._playwright = sync_playwright().start()
+            try:
+                self._browser = self._playwright.chromium.launch(headless=True)
+            except Exception:
+                self.close()
+                raise
+        page = self._browser.new_page()
+        try:
+            page.goto(url, timeout=timeout)
+            page.wait_for_load_state('networkidle')
+            # Additional wait for JS frameworks to finish rendering
+            if wait_time > 0:
+                page.wait_for_timeout(wait_time)
+            return page.content()
+        finally:
+            page.close()
+    
+    def close(self) -> None:
+        """Close the browser and stop Playwright, if they were started."""
+        try:
+            if self._browser is not None:
+                self._browser.close()
+        finally:
+            self._browser = None
+            if self._playwright is not None:
+                self._playwright.stop()
+                self._playwright = None
 
-def fetch_url_with_js(url: str, timeout: int = 30000, wait_time: int = 5000) -> str:
+def fetch_url_with_js(url: str, timeout: int = 30000, wait_time: int = 5000,
+                      browser: Optional[BrowserSession] = None) -> str:
     """Fetch URL using headless browser to render JavaScript.
     
     Args:
         url: The URL to fetch
         timeout: Navigation timeout in milliseconds (default 30 seconds)
         wait_time: Additional time to wait after networkidle for JS rendering (default 5 seconds)
+        browser: Session to render in; without one a browser is launched just for this URL
     
     Returns:
         The fully rendered HTML content
@@ -175,279 +448,487 @@ def fetch_url_with_js(url: str, timeout: int = 30000, wait_time: int = 5000) ->
     Raises:
         Exception: If browser fails to launch or page fails to load
     """
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        try:
-            page = browser.new_page()
-            page.goto(url, timeout=timeout)
-            page.wait_for_load_state('networkidle')
-            # Additional wait for JS frameworks to finish rendering
-            if wait_time > 0:
-                page.wait_for_timeout(wait_time)
-            html = page.content()
-            return html
-        finally:
-            browser.close()
+    if browser is not None:
+        return browser.fetch(url, timeout=timeout, wait_time=wait_time)
+    with BrowserSession() as session:
+        return session.fetch(url, timeout=timeout, wait_time=wait_time)
 
-def remove_non_content_elements(soup: BeautifulSoup) -> None:
-    """Remove elements that don't contribute to main content."""
-    # Remove script, style, and other non-content tags
-    for tag_name in ['script', 'style', 'nav', 'footer', 'header', 'aside', 'table', 'noscript', 'iframe', 'button']:
-        for tag in soup.find_all(tag_name):
-            tag.decompose()
+def find_outermost(soup: BeautifulSoup, matches, comments: bool = False) -> list:
+    """Collect elements for which matches(tag) is true, without looking inside them.
     
-    # Remove HTML comments
-    for comment in soup.find_all(string=lambda text: isinstance(text, Comment)):
-        comment.extract()
+    The walk stops at every match, so elements nested in an earlier match are
+    never visited and each unwanted region can be detached with one extract().
+    With comments=True, HTML comments outside the matches are collected too.
+    """
+    found = []
+    stack = [soup]
+    # Bound once: this loop runs for every node in the document
+    collect, push, pop = found.append, stack.append, stack.pop
+    while stack:
+        for child in pop().contents:
+            if isinstance(child, Tag):
+                if matches(child):
+                    collect(child)
+                else:
+                    push(child)
+            elif comments and isinstance(child, Comment):
+                collect(child)
+    return found
+
+# Tags whose whole subtree is dropped before conversion
+NON_CONTENT_TAGS = {'script', 'style', 'nav', 'footer', 'header', 'aside', 'table', 'noscript', 'iframe', 'button'}
+
+class ContentSoup(BeautifulSoup):
+    """A soup that never builds NON_CONTENT_TAGS elements or anything inside them.
+    
+    Their subtrees would only be extracted again by remove_unwanted_elements(),
+    so the builder's events for them are dropped as they arrive. The document's
+    first <title> is the exception: it is built where its skipped subtree would
+    have been, so extract_title() finds the same <title> as in a plain soup.
+    This overrides BeautifulSoup's internal tree-building hooks, so parse_html()
+    only uses it once content_soup_works() has confirmed they fit the installed
+    bs4.
+    """
+    
+    def reset(self) -> None:
+        super().reset()
+        self.skipped_tags = []  # Open element names inside the subtree being skipped
+        self.title_seen = False
+        # The first <title> when it is built from inside a skipped subtree, and
+        # the skipped_tags to resume once it closes
+        self.title_tag = None
+        self.title_skipped_tags = None
+    
+    def handle_starttag(self, name, namespace, nsprefix, attrs, *args, **kwargs) -> Optional[Tag]:
+        skipped = self.skipped_tags
+        if name == 'title' and not self.title_seen:
+            self.title_seen = True
+            if skipped:
+                self.title_skipped_tags = skipped
+                self.skipped_tags = []
+                self.title_tag = super().handle_starttag(name, namespace, nsprefix, attrs, *args, **kwargs)
+                return self.title_tag
+        if not skipped:
+            # Everything in a <title> is built, as all of its text is the title
+            if name not in NON_CONTENT_TAGS or self.open_tag_counter.get('title') or name == 'title':
+                return super().handle_starttag(name, namespace, nsprefix, attrs, *args, **kwargs)
+            # End the text before it, so it stays a separate string as after extract()
+            self.endData()
+        skipped.append(name)
+        return None  # Tells the builder the tag doesn't exist
+    
+    def handle_endtag(self, name, nsprefix=None) -> None:
+        skipped = self.skipped_tags
+        if skipped:
+            if name in skipped:
+                # Close it and anything still open inside it, as the tree would
+                del skipped[len(skipped) - 1 - skipped[::-1].index(name):]
+                return
+            if not self.open_tag_counter.get(name):
+                return  # Stray end tag
+            # Closing an element outside also closes the skipped subtree
+            skipped.clear()
+        if self.title_skipped_tags is not None:
+            self.handle_title_endtag(name, nsprefix)
+        else:
+            super().handle_endtag(name, nsprefix)
+    
+    def handle_title_endtag(self, name, nsprefix=None) -> None:
+        """Handle an end tag while a <title> from inside a skipped subtree is open.
+        
+        The open elements are then the built ones outside the skipped subtree,
+        the skipped ones around the <title>, and the built ones from the <title>
+        inward; the end tag closes the innermost of these with its name.
+        """
+        title_skipped = self.title_skipped_tags
+        tag = self.currentTag
+        while tag.name != name and tag is not self.title_tag:
+            tag = tag.parent
+        if tag.name == name:
+            super().handle_endtag(name, nsprefix)
+            if not self.open_tag_counter.get('title'):
+                # Back to skipping the rest of the subtree around the <title>
+                self.skipped_tags = title_skipped
+                self.title_skipped_tags = None
+        elif name in title_skipped:
+            while self.open_tag_counter.get('title'):
+                super().handle_endtag('title')
+            del title_skipped[len(title_skipped) - 1 - title_skipped[::-1].index(name):]
+            self.skipped_tags = title_skipped
+            self.title_skipped_tags = None
+        else:
+            super().handle_endtag(name, nsprefix)
+            if not self.open_tag_counter.get('title'):
+                # Closing an element outside closed the <title> and its subtree too
+                self.title_skipped_tags = None
+    
+    def handle_data(self, data) -> None:
+        if not self.skipped_tags:
+            super().handle_data(data)
+
+# Markup that exercises every ContentSoup hook: nested and stray end tags inside
+# a skipped subtree, an outer element closing it, text on either side, and a
+# first <title> inside a skipped subtree
+CONTENT_SOUP_PROBE = ('<header><svg><title>t<b>u</b></title></svg></header>'
+                      '<div>a<nav>b<nav>c</nav>d</p>e</div>f<p>g<script>h</script>i</p>'
+                      '<aside><b>j</b>k<table><tr><td>l</aside>m<svg><title>n</title></svg>')
+# Parser name -> whether ContentSoup builds correct trees with it
+CONTENT_SOUP_CHECKS = {}
+
+def content_soup_works(features: str) -> bool:
+    """Check, once per parser, that ContentSoup converts like a plain soup.
+    
+    Falls back to a plain BeautifulSoup (whose non-content elements are then
+    extracted by remove_unwanted_elements()) if a bs4 release has changed the
+    hooks ContentSoup relies on.
+    
+    Raises:
+        FeatureNotFound: If the parser isn't installed
+    """
+    works = CONTENT_SOUP_CHECKS.get(features)
+    if works is None:
+        expected = BeautifulSoup(CONTENT_SOUP_PROBE, features)
+        expected_title = extract_title(expected)
+        remove_unwanted_elements(expected)
+        try:
+            actual = ContentSoup(CONTENT_SOUP_PROBE, features)
+            actual_title = extract_title(actual)
+            remove_unwanted_elements(actual)
+            works = (actual_title == expected_title
+                     and render_markdown(actual) == render_markdown(expected))
+        except Exception:
+            works = False
+        CONTENT_SOUP_CHECKS[features] = works
+    return works
 
 # Tags that should never be removed by UI pattern matching (main content containers)
 PROTECTED_CONTENT_TAGS = ['body', 'main', 'article', 'section']
 
-def remove_ui_elements(soup: BeautifulSoup) -> None:
-    """Remove common UI elements like sidebars, TOCs, and navigation by class/ID patterns."""
-    # Patterns that indicate UI chrome rather than content
-    # Note: Use specific patterns to avoid false positives on content IDs like 'web-search'
-    ui_class_patterns = ['sidebar', 'toc', 'table-of-contents', 'breadcrumb', 'navigation', 
-                         'nav-', 'menu', 'search-box', 'search-form', 'search-input', 
-                         'searchbar', 'search-widget', 'skip-to', 'toolbar']
-    ui_id_patterns = ['sidebar', 'toc', 'table-of-contents', 'navigation', 'breadcrumb',
-                      'menu', 'search-box', 'search-form', 'search-input', 'searchbar']
-    
-    # Collect elements to remove (to avoid modifying while iterating)
-    elements_to_remove = []
-    
-    # Find elements by class
-    for element in soup.find_all(class_=True):
-        if element.attrs is None:
-            continue
-        classes = element.get('class', [])
-        if classes:
-            class_str = ' '.join(classes).lower()
-            if any(pattern in class_str for pattern in ui_class_patterns):
-                elements_to_remove.append(element)
-    
-    # Find elements by ID
-    for element in soup.find_all(id=True):
-        if element.attrs is None:
-            continue
-        elem_id = element.get('id', '')
-        if elem_id:
-            elem_id_lower = elem_id.lower()
-            if any(pattern in elem_id_lower for pattern in ui_id_patterns):
-                elements_to_remove.append(element)
-    
-    # Remove collected elements
-    for element in elements_to_remove:
-        if element.parent is not None:  # Element still in tree
-            if element.name in PROTECTED_CONTENT_TAGS:
-                continue  # Don't remove main content containers
-            element.decompose()
-
-def remove_links(soup: BeautifulSoup) -> None:
-    """Remove links but keep the anchor text in place."""
-    for anchor in soup.find_all('a'):
-        anchor.unwrap()
+# Patterns that indicate UI chrome rather than content
+# Note: Use specific patterns to avoid false positives on content IDs like 'web-search'
+UI_CLASS_PATTERNS = ['sidebar', 'toc', 'table-of-contents', 'breadcrumb', 'navigation', 
+                     'nav-', 'menu', 'search-box', 'search-form', 'search-input', 
+                     'searchbar', 'search-widget', 'skip-to', 'toolbar']
+UI_ID_PATTERNS = ['sidebar', 'toc', 'table-of-contents', 'navigation', 'breadcrumb',
+                  'menu', 'search-box', 'search-form', 'search-input', 'searchbar']
+def trie_pattern(words: list) -> str:
+    """Build a regex matching any of the literal words, with shared prefixes factored out.
+    
+    A flat 'a|b|c' alternation tries every word at every position; the trie form
+    only follows branches whose characters match, much like an Aho-Corasick scan.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}  # End of a word
+    
+    def build(node: dict) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        if len(branches) == 1 and '' not in node:
+            return branches[0]
+        group = f"(?:{'|'.join(branches)})"
+        return group + '?' if '' in node else group
+    
+    return build(trie)
+
+# Case-insensitive alternations, so each attribute is searched once for all patterns
+UI_CLASS_RE = re.compile(trie_pattern(UI_CLASS_PATTERNS), re.IGNORECASE)
+UI_ID_RE = re.compile(trie_pattern(UI_ID_PATTERNS), re.IGNORECASE)
+
+def is_ui_element(tag: Tag) -> bool:
+    """Check whether a tag's class or ID marks it as UI chrome."""
+    if tag.name in PROTECTED_CONTENT_TAGS:
+        return False  # Don't remove main content containers
+    attrs = tag.attrs
+    classes = attrs.get('class')
+    if classes and UI_CLASS_RE.search(' '.join(classes)):
+        return True
+    elem_id = attrs.get('id')
+    return bool(elem_id and UI_ID_RE.search(elem_id))
+
+def is_unwanted_element(tag: Tag) -> bool:
+    """Check whether a tag is a non-content element or UI chrome."""
+    return tag.name in NON_CONTENT_TAGS or is_ui_element(tag)
+
+def remove_unwanted_elements(soup: BeautifulSoup) -> None:
+    """Remove non-content elements, UI chrome and HTML comments in one tree walk."""
+    for element in find_outermost(soup, is_unwanted_element, comments=True):
+        element.extract()
+
 def extract_title(soup: BeautifulSoup) -> str:
-    """Extract the page title from <title> tag."""
+    """Extract the page title from <title> tag, removing it from the tree."""
     title_tag = soup.find('title')
     if title_tag:
         title_text = title_tag.get_text(strip=True)
-        title_tag.decompose()
+        title_tag.extract()
         return title_text
     return ""
 
-def convert_code_blocks(soup: BeautifulSoup) -> None:
-    """Convert <pre> and <code> blocks to markdown fenced code blocks."""
-    for pre in soup.find_all('pre'):
-        # Get raw text content, preserving internal whitespace
-        code_text = pre.get_text()
-        # Wrap in fenced code block
-        fenced = f"\n\n```\n{code_text}\n```\n\n"
-        pre.replace_with(fenced)
-def convert_headings(soup: BeautifulSoup) -> None:
-    """Convert h1-h6 tags to markdown heading markers."""
-    for level in range(1, 7):
-        for heading in soup.find_all(f'h{level}'):
-            text = heading.get_text(strip=True)
-            if text:
-                markdown_heading = f"\n\n{'#' * level} {text}\n\n"
-                heading.replace_with(markdown_heading)
-            else:
-                heading.decompose()
+# Characters that already separate an inline element from its neighbouring text
+SPACING_CHARS = (' ', '\n', '\t')
 
-def convert_list_item(li, indent_level: int = 0, ordered: bool = False, index: int = 1) -> str:
-    """Recursively convert a list item and its nested lists to markdown."""
-    indent = "    " * indent_level
-    result_lines = []
+# Inline formatting whose markup is dropped, with a space added where it touches text
+INLINE_TAGS = {'code', 'strong', 'em', 'b', 'i', 'span'}
+# Links are unwrapped too, but without spacing
+UNWRAPPED_TAGS = INLINE_TAGS | {'a'}
+
+# Inline and link markup is never removed from the tree. render_markdown()
+# treats it as transparent and adds the spacing as it goes, the same way
+# unwrapping each tag in document order would: a space goes before an inline
+# element when the text before it doesn't end in whitespace, and after it when
+# the text after it doesn't start with whitespace. Only text counts as a
+# neighbour; any other element separates the text around it. List items strip
+# their text pieces, so unwrapped_children() skips the spacing.
+
+def unwrapped_children(tag: Tag):
+    """Yield the children of tag as they would be with inline and link markup unwrapped."""
+    stack = [iter(tag.contents)]
+    while stack:
+        for child in stack[-1]:
+            if isinstance(child, Tag) and child.name in UNWRAPPED_TAGS:
+                stack.append(iter(child.contents))
+                break
+            yield child
+        else:
+            stack.pop()
+
+LIST_TAGS = {'ul', 'ol'}
+
+def list_items(list_tag: Tag) -> list:
+    """Return the <li> children of a list, last first, ready to be popped in order."""
+    items = [child for child in unwrapped_children(list_tag) if isinstance(child, Tag) and child.name == 'li']
+    items.reverse()
+    return items
+
+def convert_list(list_tag, indent_level: int = 0) -> str:
+    """Convert a <ul>/<ol> and the lists nested in its items to markdown.
     
-    # Get direct text content (not from nested lists)
-    # Clone the li to work with
-    direct_text_parts = []
-    for child in li.children:
-        if hasattr(child, 'name') and child.name in ['ul', 'ol']:
-            continue  # Skip nested lists for now
-        if hasattr(child, 'get_text'):
-            direct_text_parts.append(child.get_text(strip=True))
-        elif isinstance(child, str):
-            text = child.strip()
+    Nested lists are reached by descending from their parent item, so no
+    upward parent lookups are needed to tell top-level lists apart.
+    Uses an explicit stack so deeply nested lists can't hit the recursion limit.
+    """
+    result_lines = []
+    # Each entry is an open list: its remaining items, nesting level, whether it
+    # is ordered and how many items it has emitted. Nested lists go on top, so
+    # they are finished before the rest of their parent list.
+    stack = [[list_items(list_tag), indent_level, list_tag.name == 'ol', 0]]
+    
+    while stack:
+        entry = stack[-1]
+        items, level, ordered, index = entry
+        if not items:
+            stack.pop()
+            continue
+        li = items.pop()
+        index = entry[3] = index + 1
+        
+        # Get direct text content (nested lists are converted below). Spacing
+        # around inline elements would be stripped here, so it is skipped.
+        direct_text_parts = []
+        nested_lists = []
+        for child in unwrapped_children(li):
+            if not isinstance(child, Tag):
+                text = child.strip()
+            elif child.name in LIST_TAGS:
+                nested_lists.append(child)
+                continue
+            else:
+                text = child.get_text(strip=True)
             if text:
                 direct_text_parts.append(text)
+        
+        # Create the list item marker
+        if direct_text_parts:
+            marker = f"{index}." if ordered else "-"
+            result_lines.append(f"{'    ' * level}{marker} {' '.join(direct_text_parts)}")
+        
+        for nested_list in reversed(nested_lists):
+            stack.append([list_items(nested_list), level + 1, nested_list.name == 'ol', 0])
     
-    direct_text = ' '.join(direct_text_parts).strip()
-    
-    # Create the list item marker
-    if ordered:
-        marker = f"{index}."
-    else:
-        marker = "-"
-    
-    if direct_text:
-        result_lines.append(f"{indent}{marker} {direct_text}")
+    return '\n'.join(result_lines)
+
+# Note: 'pre' is fenced rather than spaced like the other blocks
+BLOCK_TAGS = {'p', 'div', 'section', 'article', 'blockquote'}
+HEADING_TAGS = {'h1', 'h2', 'h3', 'h4', 'h5', 'h6'}
+
+def render_markdown(root: Tag, raw: bool = False) -> str:
+    """Render the tree as markdown text in a single document-order walk.
     
-    # Process nested lists
-    for nested_ul in li.find_all('ul', recursive=False):
-        for nested_li in nested_ul.find_all('li', recursive=False):
-            nested_result = convert_list_item(nested_li, indent_level + 1, ordered=False)
-            if nested_result:
-                result_lines.append(nested_result)
+    Headings become heading markers, <pre> becomes a fenced code block,
+    lists become markdown list items, block elements are separated by
+    blank lines and <br> by a newline.
+    Uses an explicit stack so deeply nested pages can't hit the recursion limit.
     
-    for nested_ol in li.find_all('ol', recursive=False):
-        for idx, nested_li in enumerate(nested_ol.find_all('li', recursive=False), start=1):
-            nested_result = convert_list_item(nested_li, indent_level + 1, ordered=True, index=idx)
-            if nested_result:
-                result_lines.append(nested_result)
+    Args:
+        root: The soup or element whose contents are rendered
+        raw: Only add the inline spacing, otherwise returning the text like
+            get_text() (used for the contents of <pre>)
+    """
+    parts = []
+    # Each entry is a children iterator, the kind of element it belongs to and
+    # the text to emit once it is exhausted
+    stack = [(iter(root.contents), 'element', '')]
+    # Bound once: this loop runs for every node in the document
+    emit, push, pop = parts.append, stack.append, stack.pop
+    prev_text = None       # Last string beside the next child, if any
+    space_pending = False  # An inline element just ended and may need a space after it
+    
+    while stack:
+        children, kind, closing = stack[-1]
+        for child in children:
+            if not isinstance(child, Tag):
+                if space_pending and child and not child.startswith(SPACING_CHARS):
+                    emit(' ')
+                space_pending = False
+                if type(child) in TEXT_STRING_TYPES:
+                    emit(child)
+                prev_text = child
+                continue
+            
+            name = child.name
+            if name in INLINE_TAGS:
+                # Inline markup is transparent, with a space where it touches text
+                space_pending = False
+                if prev_text and not prev_text.endswith(SPACING_CHARS):
+                    emit(' ')
+                    prev_text = ' '
+                push((iter(child.contents), 'inline', ''))
+                break
+            if name == 'a':
+                push((iter(child.contents), 'link', ''))
+                break
+            
+            # Any other element separates the text around it
+            prev_text = None
+            space_pending = False
+            if raw:
+                push((iter(child.contents), 'element', ''))
+                break
+            if name in HEADING_TAGS:
+                text = child.get_text(strip=True)
+                if text:
+                    emit(f"\n\n{'#' * int(name[1])} {text}\n\n")
+            elif name == 'pre':
+                # Get raw text content, preserving internal whitespace
+                emit(f"\n\n```\n{render_markdown(child, raw=True)}\n```\n\n")
+            elif name in LIST_TAGS:
+                # Nested lists are handled by convert_list, so this is a top-level list
+                list_text = convert_list(child)
+                if list_text:
+                    emit(f"\n{list_text}\n")
+            elif name == 'br':
+                emit('\n')
+            elif name in BLOCK_TAGS:
+                emit('\n\n')
+                push((iter(child.contents), 'element', '\n\n'))
+                break
+            else:
+                push((iter(child.contents), 'element', ''))
+                break
+        else:
+            # All children rendered; close this element
+            pop()
+            if kind == 'inline':
+                space_pending = True
+            elif kind == 'element':
+                emit(closing)
+                prev_text = None
+                space_pending = False
+    
+    return ''.join(parts)
+
+# "Was this page helpful?" and similar feedback widget text
+FEEDBACK_PATTERNS = [
+    r'Was this page helpful\??\s*',
+    r'\bYes\s*No\b',
+    r'YesNo\b',
+    r'Rate this page.*',
+    r'Give feedback.*',
+    r'Edit this page.*',
+    r'⌘[A-Z]',  # Keyboard shortcut indicators like ⌘K
+]
+
+def pattern_first_char(pattern: str) -> str:
+    """Return the literal character every match of a feedback pattern starts with.
     
-    return '\n'.join(result_lines)
+    Raises:
+        ValueError: If the pattern doesn't start with a single literal character
+    """
+    if pattern.startswith(r'\b'):
+        pattern = pattern[2:]  # A word boundary doesn't consume a character
+    if not pattern or pattern[0] in '\\.^$*+?{}[]|()' or pattern[1:2] in ('*', '?', '{'):
+        raise ValueError(f"Feedback pattern {pattern!r} must start with a literal character")
+    return pattern[0]
 
-def convert_lists(soup: BeautifulSoup) -> None:
-    """Convert list items to markdown format with proper nesting."""
-    # Process only top-level lists (not nested ones)
-    for ul in soup.find_all('ul'):
-        # Skip if this ul is nested inside another list
-        if ul.find_parent(['ul', 'ol']):
-            continue
-        
-        list_lines = []
-        for li in ul.find_all('li', recursive=False):
-            item_text = convert_list_item(li, indent_level=0, ordered=False)
-            if item_text:
-                list_lines.append(item_text)
-        
-        if list_lines:
-            ul.replace_with('\n' + '\n'.join(list_lines) + '\n')
-        else:
-            ul.decompose()
+# Characters that a feedback pattern can start with, in either case
+FEEDBACK_FIRST_CHARS = ''.join(sorted({char for pattern in FEEDBACK_PATTERNS
+                                       for char in (pattern_first_char(pattern).upper(),
+                                                    pattern_first_char(pattern).lower())}))
+# The patterns run on the whole text before whitespace is collapsed, so matches
+# like 'Yes' and 'No' in separate blocks still span lines, and a space in a
+# pattern stands for any run of whitespace within a line
+FEEDBACK_SPACE = r'[^\S\n]+'
+# One alternation so the text is scanned once rather than once per pattern.
+# The lookahead is a plain character set, so most positions are rejected after
+# one check instead of trying every branch case-insensitively.
+FEEDBACK_RE = re.compile(
+    f"(?=[{re.escape(FEEDBACK_FIRST_CHARS)}])"
+    f"(?i:{'|'.join(f'(?:{pattern})'.replace(' ', FEEDBACK_SPACE) for pattern in FEEDBACK_PATTERNS)})"
+)
+
+def clean_text(text: str) -> str:
+    """Tidy extracted text in a single pass over its lines.
     
-    for ol in soup.find_all('ol'):
-        # Skip if this ol is nested inside another list
-        if ol.find_parent(['ul', 'ol']):
+    Removes feedback widget text, collapses whitespace within each line,
+    keeps at most one blank line between paragraphs, and drops headings
+    that have no content before the next heading or the end of the text.
+    """
+    result = []
+    pending_heading = None  # Heading waiting for content before it is kept
+    pending_gap = False     # Whether a blank line preceded the pending heading
+    gap = False             # Whether a blank line was seen since the last line
+    
+    for line in FEEDBACK_RE.sub('', text).split('\n'):
+        # Most lines are empty and need no whitespace cleanup
+        if not line:
+            gap = True
             continue
         
-        list_lines = []
-        for idx, li in enumerate(ol.find_all('li', recursive=False), start=1):
-            item_text = convert_list_item(li, indent_level=0, ordered=True, index=idx)
-            if item_text:
-                list_lines.append(item_text)
+        line = ' '.join(line.split())
+        if not line:
+            gap = True
+            continue
         
-        if list_lines:
-            ol.replace_with('\n' + '\n'.join(list_lines) + '\n')
-        else:
-            ol.decompose()
-
-def add_inline_spacing(soup: BeautifulSoup) -> None:
-    """Add spaces around inline elements to prevent word concatenation."""
-    inline_tags = ['code', 'strong', 'em', 'b', 'i', 'span']
-    
-    for tag_name in inline_tags:
-        for tag in soup.find_all(tag_name):
-            # Check if we need to add space before
-            prev_sibling = tag.previous_sibling
-            if prev_sibling and isinstance(prev_sibling, str) and prev_sibling and not prev_sibling.endswith((' ', '\n', '\t')):
-                tag.insert_before(' ')
-            
-            # Check if we need to add space after
-            next_sibling = tag.next_sibling
-            if next_sibling and isinstance(next_sibling, str) and next_sibling and not next_sibling.startswith((' ', '\n', '\t')):
-                tag.insert_after(' ')
-            
-            # Unwrap the tag (keep content, remove markup)
-            tag.unwrap()
-
-def add_block_spacing(soup: BeautifulSoup) -> None:
-    """Add spacing markers for block-level elements."""
-    # Note: 'pre' is handled separately by convert_code_blocks
-    block_tags = ['p', 'div', 'section', 'article', 'blockquote']
-    
-    for tag_name in block_tags:
-        for tag in soup.find_all(tag_name):
-            # Add newlines before and after content
-            text = tag.get_text()
-            tag.replace_with(f"\n\n{text}\n\n")
-    
-    # Handle line breaks
-    for br in soup.find_all('br'):
-        br.replace_with('\n')
-
-def normalize_whitespace(text: str) -> str:
-    """Collapse excessive whitespace while preserving paragraph structure."""
-    # Normalize different types of whitespace to spaces (except newlines)
-    text = re.sub(r'[^\S\n]+', ' ', text)
-    
-    # Collapse multiple newlines to maximum of two (paragraph break)
-    text = re.sub(r'\n{3,}', '\n\n', text)
-    
-    # Remove spaces at the beginning and end of lines
-    text = re.sub(r' *\n *', '\n', text)
-    
-    # Remove leading/trailing whitespace from the whole text
-    text = text.strip()
-    
-    return text
-
-def remove_feedback_patterns(text: str) -> str:
-    """Remove common UI feedback widget patterns."""
-    # Remove "Was this page helpful?" and similar patterns
-    patterns = [
-        r'Was this page helpful\??\s*',
-        r'\bYes\s*No\b',
-        r'YesNo\b',
-        r'Rate this page.*',
-        r'Give feedback.*',
-        r'Edit this page.*',
-        r'⌘[A-Z]',  # Keyboard shortcut indicators like ⌘K
-    ]
-    
-    for pattern in patterns:
-        text = re.sub(pattern, '', text, flags=re.IGNORECASE)
-    
-    return text
-
-def remove_empty_sections(text: str) -> str:
-    """Remove headings that have no content before the next heading."""
-    lines = text.split('\n')
-    result = []
-    i = 0
-    
-    while i < len(lines):
-        line = lines[i]
+        if line.startswith('#'):
+            # A heading directly followed by another heading is empty; replace it
+            if pending_heading is not None:
+                gap = gap or pending_gap
+            pending_heading, pending_gap, gap = line, gap, False
+            continue
         
-        # Check if this is a heading line
-        if line.strip().startswith('#'):
-            # Look ahead to see if next non-empty line is also a heading
-            j = i + 1
-            while j < len(lines) and not lines[j].strip():
-                j += 1
-            
-            # If we reached end of file or next content is a heading, skip this heading
-            if j >= len(lines) or lines[j].strip().startswith('#'):
-                i += 1
-                continue
+        if pending_heading is not None:
+            if result and pending_gap:
+                result.append('')
+            result.append(pending_heading)
+            pending_heading = None
         
+        if result and gap:
+            result.append('')
         result.append(line)
-        i += 1
+        gap = False
     
+    # A heading left pending at the end of the text has no content
     return '\n'.join(result)
 
+# Notices placed at the top of every converted file
+CONVERSION_NOTICE = "> [This file is converted from HTML. Non-primary content has been removed while trying to preserve structure.]\n\n"
+HEADLESS_NOTICE = "> [This file is converted from HTML using headless browser rendering. Non-primary content has been removed while trying to preserve structure.]\n\n"
+JS_WARNING_NOTICE = "> [This file is converted from HTML. Non-primary content has been removed while trying to preserve structure.]\n>\n> **Warning: This page appears to use JavaScript rendering. The main content may be missing because a headless browser was not used before conversion.**\n\n"
+
 def html_to_markdown(html_content: str, used_js_rendering: bool = False) -> tuple[str, bool]:
     """Convert HTML content to clean markdown text.
     
@@ -459,67 +940,117 @@ def html_to_markdown(html_content: str, used_js_rendering: bool = False) -> tupl
         tuple: (markdown_content, is_js_rendered) where is_js_rendered indicates
                if the content appears to be JavaScript-rendered (SPA).
     """
-    soup = BeautifulSoup(html_content, 'html.parser')
-    
-    # Detect JS-rendered content before modifying the soup
-    is_js_rendered = detect_js_rendered_content(soup, html_content)
-    
-    # Re-parse since detection may have modified the soup
-    soup = BeautifulSoup(html_content, 'html.parser')
-    
-    # Step 1: Extract title before removing elements
-    title = extract_title(soup)
-    
-    # Step 2: Remove non-content elements (scripts, styles, nav, etc.)
-    remove_non_content_elements(soup)
-    
-    # Step 3: Remove UI chrome (sidebars, TOCs, breadcrumbs by class/ID)
-    remove_ui_elements(soup)
-    
-    # Step 4: Remove link markup (keep anchor text)
-    remove_links(soup)
-    
-    # Step 5: Add spacing around inline elements before unwrapping
-    add_inline_spacing(soup)
-    
-    # Step 6: Convert code blocks to fenced markdown
-    convert_code_blocks(soup)
-    
-    # Step 7: Convert headings to markdown
-    convert_headings(soup)
-    
-    # Step 8: Convert lists to markdown (with nesting support)
-    convert_lists(soup)
-    
-    # Step 9: Add spacing for block elements
-    add_block_spacing(soup)
-    
-    # Step 10: Extract text and normalize whitespace
-    text = soup.get_text()
-    text = normalize_whitespace(text)
-    
-    # Step 11: Remove common feedback UI patterns
-    text = remove_feedback_patterns(text)
-    
-    # Step 12: Remove empty sections (headings with no content)
-    text = remove_empty_sections(text)
-    
-    # Step 13: Add title as H1 if extracted
-    if title:
-        text = f"# {title}\n\n{text}"
-    
-    # Step 14: Add conversion notice at top
+    # Input without any markup (e.g. an empty body from a failed fetch) has
+    # nothing to parse, detect or strip; only its entities and whitespace need
+    # tidying
+    if '<' not in html_content:
+        notice = HEADLESS_NOTICE if used_js_rendering else CONVERSION_NOTICE
+        return notice + clean_text(html.unescape(html_content)), False
+    
+    soup = None
+    if has_spa_indicator(html_content):
+        # Detect JS-rendered content before modifying the soup
+        soup, title = parse_html(html_content)
+        is_js_rendered = detect_js_rendered_content(soup, html_content)
+    else:
+        # Without SPA indicators the page is never flagged, so the tree is only
+        # needed for conversion
+        is_js_rendered = False
+    
+    # Step 1: Extract title before removing elements (parse_html() takes it
+    # out of the tree)
+    if soup is None:
+        # Not needed for detection, so non-content elements are never built
+        soup, title = parse_html(html_content, skip_non_content=True)
+    
+    # Step 2: Remove non-content elements (scripts, styles, nav, etc.) left
+    # in the detection tree, UI chrome (sidebars, TOCs, breadcrumbs by
+    # class/ID) and HTML comments
+    remove_unwanted_elements(soup)
+    
+    # Step 3: Render headings, code blocks, lists (with nesting support),
+    # block spacing and inline spacing as markdown text
+    text = render_markdown(soup)
+    
+    # Step 4: Normalize whitespace, remove feedback UI patterns and drop
+    # empty sections (headings with no content) in one pass
+    text = clean_text(text)
+    
+    # Step 5: Pick the conversion notice for the top of the file
     if used_js_rendering:
-        notice = "> [This file is converted from HTML using headless browser rendering. Non-primary content has been removed while trying to preserve structure.]\n\n"
+        notice = HEADLESS_NOTICE
     elif is_js_rendered:
-        notice = "> [This file is converted from HTML. Non-primary content has been removed while trying to preserve structure.]\n>\n> **Warning: This page appears to use JavaScript rendering. The main content may be missing because a headless browser was not used before conversion.**\n\n"
+        notice = JS_WARNING_NOTICE
     else:
-        notice = "> [This file is converted from HTML. Non-primary content has been removed while trying to preserve structure.]\n\n"
-    text = notice + text
+        notice = CONVERSION_NOTICE
+    
+    # Step 6: Assemble notice, title (as H1 if extracted) and body in one join,
+    # rather than copying the whole document once per prepended piece
+    title_heading = f"# {title}\n\n" if title else ""
+    text = ''.join((notice, title_heading, text))
     
     return text, is_js_rendered
 
-def process_input(input_path: str, output_dir: str, render_js_mode: str = 'auto', wait_time: int = 5000) -> bool:
+def write_text_file(path: str, content: str) -> None:
+    """Write content to path as UTF-8, replacing any existing file.
+    
+    Encodes once and hands the bytes straight to os.write(), skipping the
+    text and buffer layers of open() for what is always a single write.
+    """
+    data = memoryview(content.encode('utf-8'))
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+    try:
+        while data:
+            data = data[os.write(fd, data):]
+    finally:
+        os.close(fd)
+
+# Conversion cache, kept inside the output directory
+CACHE_DIR_NAME = '.cache'
+
+@lru_cache(maxsize=None)
+def converter_digest() -> Optional[bytes]:
+    """Digest of this script, so edits to the converter invalidate cached output.
+    
+    Read on first use, so runs without --cache never touch the script's file.
+    Returns None (and warns once) if the source can't be read, e.g. from a
+    frozen bundle, in which case nothing is cached.
+    """
+    try:
+        source = Path(__file__).read_bytes()
+    except (NameError, OSError) as e:
+        print(f"  Warning: Could not read the converter source, so --cache is disabled: {e}")
+        return None
+    return hashlib.blake2b(source, digest_size=32).digest()
+
+def conversion_cache_key(html_content: str, used_js_rendering: bool) -> str:
+    """Hash the HTML together with everything else that affects its conversion."""
+    digest = hashlib.blake2b(digest_size=16, key=converter_digest())
+    digest.update(b'js:1\n' if used_js_rendering else b'js:0\n')
+    digest.update(html_content.encode('utf-8', 'surrogatepass'))
+    return digest.hexdigest()
+
+def load_cached_markdown(cache_path: str) -> Optional[str]:
+    """Return the cached markdown at cache_path, or None if it isn't cached."""
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            return f.read()
+    except (OSError, UnicodeDecodeError):
+        return None
+
+def store_cached_markdown(cache_path: str, markdown_content: str) -> None:
+    """Save converted markdown to the cache. Failures only cost a future cache miss."""
+    # Write to a private temp file first so concurrent workers never see a partial entry
+    temp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        write_text_file(temp_path, markdown_content)
+        os.replace(temp_path, cache_path)
+    except OSError as e:
+        print(f"  Warning: Could not write cache entry '{cache_path}': {e}")
+
+def process_input(input_path: str, output_dir: str, render_js_mode: str = 'auto', wait_time: int = 5000,
+                  use_cache: bool = False, browser: Optional[BrowserSession] = None) -> bool:
     """Process a single input file or URL. Returns True on success.
     
     Args:
@@ -530,12 +1061,15 @@ def process_input(input_path: str, output_dir: str, render_js_mode: str = 'auto'
             - 'always': Always use Playwright for URLs (requires playwright)
             - 'never': Never use Playwright, just warn about JS content
         wait_time: Time to wait for JS rendering in milliseconds (default 5000)
+        use_cache: Reuse the stored conversion of identical HTML from output_dir/.cache
+        browser: Headless browser session to render in, shared with other inputs
     """
-    output_path = get_output_path(input_path, output_dir)
+    input_is_url = is_url(input_path)
+    output_path = get_output_path(input_path, output_dir, input_is_url)
     used_js_rendering = False
     
     # Read HTML from file or URL
-    if is_url(input_path):
+    if input_is_url:
         # For 'always' mode, use Playwright directly
         if render_js_mode == 'always':
             if not PLAYWRIGHT_AVAILABLE:
@@ -544,26 +1078,31 @@ def process_input(input_path: str, output_dir: str, render_js_mode: str = 'auto'
                 return False
             try:
                 print(f"Rendering '{input_path}' with headless browser...")
-                html_content = fetch_url_with_js(input_path, wait_time=wait_time)
+                html_content = fetch_url_with_js(input_path, wait_time=wait_time, browser=browser)
                 used_js_rendering = True
             except Exception as e:
                 print(f"Error: Failed to render '{input_path}' with headless browser: {e}")
                 return False
         else:
             # Start with simple fetch
-            html_content = fetch_url(input_path)
+            try:
+                html_content = fetch_url(input_path)
+            except FetchError as e:
+                print(f"Error: {e}")
+                return False
             
             # Check if JS rendering is needed (only for 'auto' mode)
             if render_js_mode == 'auto':
-                soup = BeautifulSoup(html_content, 'html.parser')
-                is_js_page = detect_js_rendered_content(soup, html_content)
+                # Pages without SPA indicators are never flagged, so skip parsing them
+                is_js_page = (has_spa_indicator(html_content)
+                              and detect_js_rendered_content(parse_html(html_content)[0], html_content))
                 
                 if is_js_page:
                     if PLAYWRIGHT_AVAILABLE:
                         # Try to render with Playwright
                         try:
                             print(f"  JS rendering detected, re-fetching '{input_path}' with headless browser...")
-                            html_content = fetch_url_with_js(input_path, wait_time=wait_time)
+                            html_content = fetch_url_with_js(input_path, wait_time=wait_time, browser=browser)
                             used_js_rendering = True
                         except Exception as e:
                             print(f"  Warning: Failed to render JavaScript for '{input_path}': {e}")
@@ -585,13 +1124,25 @@ def process_input(input_path: str, output_dir: str, render_js_mode: str = 'auto'
             print(f"Error: Unable to decode '{input_path}' as UTF-8.")
             return False
     
-    # Convert to markdown
-    markdown_content, is_js_rendered = html_to_markdown(html_content, used_js_rendering)
+    # Convert to markdown, skipping the conversion when identical HTML is cached
+    markdown_content = None
+    use_cache = use_cache and converter_digest() is not None
+    if use_cache:
+        cache_key = conversion_cache_key(html_content, used_js_rendering)
+        cache_path = os.path.join(output_dir, CACHE_DIR_NAME, f"{cache_key}.md")
+        markdown_content = load_cached_markdown(cache_path)
+    
+    if markdown_content is None:
+        markdown_content, is_js_rendered = html_to_markdown(html_content, used_js_rendering)
+        if use_cache:
+            store_cached_markdown(cache_path, markdown_content)
+    else:
+        # The notice at the top records whether the JS warning was issued
+        is_js_rendered = markdown_content.startswith(JS_WARNING_NOTICE)
     
     # Write markdown file
     try:
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(markdown_content)
+        write_text_file(output_path, markdown_content)
     except PermissionError:
         print(f"Error: Permission denied writing to '{output_path}'.")
         return False
@@ -613,6 +1164,31 @@ def process_input(input_path: str, output_dir: str, render_js_mode: str = 'auto'
     
     return True
 
+# Upper bound on worker threads when converting several inputs at once
+MAX_FETCH_THREADS = 16
+
+def drain_queue(pending: queue.SimpleQueue):
+    """Yield items from a queue shared between threads until it is empty."""
+    while True:
+        try:
+            yield pending.get_nowait()
+        except queue.Empty:
+            return
+
+def convert_inputs(input_groups, convert) -> list:
+    """Convert inputs one after another in this worker. Returns their success flags.
+    
+    Args:
+        input_groups: Lists of inputs that share an output file, as a list or an
+            iterator shared with other workers. Each list is converted in order,
+            so its last input's output is the one that is kept.
+        convert: process_input() with its options bound
+    """
+    # Launched only if an input needs JS rendering, then reused for the rest
+    with BrowserSession() as browser:
+        return [convert(input_path, browser=browser) for input_paths in input_groups
+                for input_path in input_paths]
+
 def main():
     parser = argparse.ArgumentParser(
         description='Convert HTML to markdown. Remove links and preserve structure. Outputs saved to output folder.'
@@ -647,8 +1223,22 @@ def main():
         metavar='MS',
         help='Time to wait for JS rendering in milliseconds (default: 5000)'
     )
+    parser.add_argument(
+        '--cache',
+        action=argparse.BooleanOptionalAction,
+        default=False,
+        help='Reuse earlier conversions of identical HTML, stored in <output-dir>/.cache (default: off)'
+    )
+    parser.add_argument(
+        '-j', '--jobs',
+        type=int,
+        metavar='N',
+        help='Convert inputs in N worker processes instead of threads (for large batches of local files)'
+    )
     
     args = parser.parse_args()
+    if args.jobs is not None and args.jobs < 1:
+        parser.error('--jobs must be at least 1')
     
     # Determine render mode
     if args.render_js:
@@ -662,15 +1252,36 @@ def main():
     output_dir = args.output_dir
     os.makedirs(output_dir, exist_ok=True)
     
-    # Process each input
-    success_count = 0
-    fail_count = 0
-    
+    # Process inputs concurrently. Threads overlap network waits for URLs;
+    # --jobs uses processes so CPU-bound conversion runs in parallel too.
+    # Each worker converts a series of inputs, sharing one headless browser.
+    convert = partial(process_input, output_dir=output_dir, render_js_mode=render_js_mode,
+                      wait_time=args.wait_time, use_cache=args.cache)
+    # Inputs with the same output file go to one worker, which converts them in
+    # order, so writes to a file never overlap and the last input wins
+    output_groups = {}
     for input_path in args.inputs:
-        if process_input(input_path, output_dir, render_js_mode, args.wait_time):
-            success_count += 1
-        else:
-            fail_count += 1
+        output_groups.setdefault(get_output_path(input_path, output_dir), []).append(input_path)
+    input_groups = list(output_groups.values())
+    if args.jobs:
+        # Processes each take an even share of the inputs up front
+        workers = min(args.jobs, len(input_groups))
+        executor = ProcessPoolExecutor(max_workers=workers)
+        batches = [input_groups[i::workers] for i in range(workers)]
+    else:
+        # Threads pull from a shared queue, so a slow input doesn't hold up the rest
+        workers = min(MAX_FETCH_THREADS, len(input_groups))
+        executor = ThreadPoolExecutor(max_workers=workers)
+        pending = queue.SimpleQueue()
+        for input_paths in input_groups:
+            pending.put(input_paths)
+        batches = [drain_queue(pending) for _ in range(workers)]
+    with executor:
+        results = [success for batch_results in executor.map(partial(convert_inputs, convert=convert), batches)
+                   for success in batch_results]
+    
+    success_count = sum(results)
+    fail_count = len(results) - success_count
     
     # Summary for multiple files
     if len(args.inputs) > 1: